@@ -1,12 +1,39 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.ext.declarative import declarative_base
 import os
 
 SQLALCHEMY_DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///:memory:")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 20))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 40))
+DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 5))  # seconds
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))  # seconds
+
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+
+if IS_SQLITE:
+    # Pool sizing is deliberately left at SQLAlchemy's defaults for SQLite,
+    # which is only used for local runs and tests
+    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+else:
+    # A bounded pool: when every connection is busy a caller waits at most
+    # DB_POOL_TIMEOUT seconds, then gets a TimeoutError instead of hanging.
+    # LIFO checkout keeps reusing the most recently returned connections, so
+    # idle extras age out via pool_recycle instead of all staying half-warm.
+    engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+        pool_use_lifo=True,
+    )
+# Objects returned by the repositories are serialised after commit; keep
+# their loaded state instead of reloading it with another SELECT
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 Base = declarative_base()
 
 def get_db():
@@ -15,3 +42,23 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def warm_pool():
+    """
+    Open the pool's base connections up front.
+
+    Holds `pool_size` connections at once and runs `SELECT 1` on each, so the
+    first requests after startup do not pay the connection setup cost.
+    Skipped for SQLite, where opening a connection is cheap.
+    """
+    if IS_SQLITE or not isinstance(engine.pool, QueuePool):
+        return
+    connections = []
+    try:
+        for _ in range(engine.pool.size()):
+            conn = engine.connect()
+            conn.execute(text("SELECT 1"))
+            connections.append(conn)
+    finally:
+        for conn in connections:
+            conn.close()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, SmallInteger, String, LargeBinary, Date, Boolean, ForeignKey, DateTime, Index, Computed, DDL, event, extract
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from .db import Base
@@ -13,12 +13,12 @@ class User(Base):
         email (str): User's email address (unique).
         hashed_password (str): Hashed password for authentication.
         is_verified (bool): Indicates if the user's email is verified.
-        verification_token (str): Token for email verification.
+        verification_token (bytes): HMAC-SHA256 digest of the email verification token.
         avatar (str): Path to the user's avatar image.
         avatar_url (str): URL to the user's avatar image.
         created_at (datetime): Date and time of user creation.
         role (str): Role of the user, possible values are 'user' and 'admin'.
-        contacts (List[Contact]): List of user's contacts.
+        contacts (List[Contact]): List of user's contacts (never lazy-loaded; use selectinload).
 
     Note:
     To grant admin rights, update the user's role in the database manually:
@@ -30,13 +30,13 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     is_verified = Column(Boolean, default=False)
-    verification_token = Column(String, nullable=True, unique=True)
+    verification_token = Column(LargeBinary(32), nullable=True, unique=True, index=True)
     avatar = Column(String, nullable=True)
     avatar_url = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     role = Column(String, default="user", nullable=False)
 
-    contacts = relationship("Contact", back_populates="user")
+    contacts = relationship("Contact", back_populates="user", lazy="raise")
 
 class Contact(Base):
     """
@@ -49,18 +49,38 @@ class Contact(Base):
         email (str): Contact's email address (unique).
         phone (str): Contact's phone number.
         birthday (date): Contact's birthday.
+        birthday_month (int): Month of the birthday, generated by the database.
+        birthday_day (int): Day of the month of the birthday, generated by the database.
         additional_data (str): Additional information about the contact.
         user_id (int): ID of the user who owns the contact.
-        user (User): Reference to the owner user.
+        user (User): Reference to the owner user (never lazy-loaded; use selectinload).
     """
     __tablename__ = "contacts"
-    
+    __table_args__ = (
+        Index("ix_birthday_md_user", "user_id", "birthday_month", "birthday_day"),
+        # Trigram indexes let Postgres serve the unanchored ILIKE search
+        Index("ix_contacts_first_name_trgm", "first_name", postgresql_using="gin",
+              postgresql_ops={"first_name": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        Index("ix_contacts_last_name_trgm", "last_name", postgresql_using="gin",
+              postgresql_ops={"last_name": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        Index("ix_contacts_email_trgm", "email", postgresql_using="gin",
+              postgresql_ops={"email": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     first_name = Column(String, index=True)
     last_name = Column(String, index=True)
     email = Column(String, unique=True, index=True)
     phone = Column(String)
     birthday = Column(Date)
+    birthday_month = Column(SmallInteger, Computed(extract("month", birthday), persisted=True))
+    birthday_day = Column(SmallInteger, Computed(extract("day", birthday), persisted=True))
     additional_data = Column(String, nullable=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    user = relationship("User", back_populates="contacts")
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user = relationship("User", back_populates="contacts", lazy="raise")
+
+event.listen(
+    Contact.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
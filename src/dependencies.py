@@ -1,44 +1,93 @@
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
 from .auth_jwt import verify_access_token
 from .database.db import get_db
+from .database.models import User
 from .repository import users as user_repo
 from src.services.redis_service import redis_client
-import json
-from datetime import datetime
+from cachetools import TTLCache
+import orjson
+import hashlib
+import time
 
-def default_serializer(obj):
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    raise TypeError(f"Type {type(obj)} not serializable")
+USER_CACHE_TTL = 900  # 15 min
+BAD_TOKEN = b"__BAD__"
+BAD_TOKEN_TTL = 1  # seconds; short so the negative cache stays small
+TOKEN_CACHE_MAXSIZE = 10_000
+TOKEN_CACHE_TTL = 5  # seconds
+# Only what the routes need once the user is loaded; the password hash and
+# the binary token digest never leave the database
+USER_COLUMNS = tuple(
+    c.name for c in User.__table__.columns if c.name not in ("hashed_password", "verification_token")
+)
+
+# (user_id, exp) per sha256(token), checked before Redis; the raw token is
+# never stored. Only touched from the event loop, so no lock is needed.
+_token_cache = TTLCache(maxsize=TOKEN_CACHE_MAXSIZE, ttl=TOKEN_CACHE_TTL)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+async def _resolve_user_id(token: str):
+    """
+    Map a bearer token to its user id: in-process cache, then Redis, then JWT decode.
+
+    Args:
+        token (str): The raw bearer token.
+
+    Returns:
+        int or None: The user id, or None if the token is invalid or expired.
+    """
+    token_hash = hashlib.sha256(token.encode()).digest()
+    cached = _token_cache.get(token_hash)
+    # Never serve an entry past the token's own expiry
+    if cached is not None and time.time() < cached[1]:
+        return cached[0]
+    token_key = f"jwt:{token_hash.hex()}"
+    cached_id = await redis_client.get(token_key)
+    if cached_id == BAD_TOKEN:
+        return None
+    if cached_id:
+        user_id, exp = map(int, cached_id.split(b":"))
+    else:
+        payload = verify_access_token(token)
+        user_id = payload.get("user_id") if payload else None
+        if user_id is None:
+            await redis_client.set(token_key, BAD_TOKEN, ex=BAD_TOKEN_TTL)
+            return None
+        exp = int(payload.get("exp", 0))
+        # Same few seconds as the in-process cache: enough to spare other
+        # workers a decode during a burst, never past the token's own exp
+        ttl = min(TOKEN_CACHE_TTL, exp - int(time.time()))
+        if ttl > 0:
+            await redis_client.set(token_key, f"{user_id}:{exp}", ex=ttl)
+    _token_cache[token_hash] = (user_id, exp)
+    return user_id
+
 async def get_current_user(token: str = Depends(oauth2_scheme), db=Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    # Try to get user from Redis cache
-    cache_key = f"user_token:{token}"
-    cached_user = await redis_client.get(cache_key)
-    if cached_user:
-        user_data = json.loads(cached_user)
-        # Recreate User object from dict (optional: depends on usage)
-        from src.database.models import User
-        user = User(**user_data)
-        return user
-    payload = verify_access_token(token)
-    if payload is None:
+    user_id = await _resolve_user_id(token)
+    if user_id is None:
         raise credentials_exception
-    user = user_repo.get_user_by_email(db, payload.get("sub"))
+    # Users are cached by id so every token issued to a user shares one entry
+    user_key = f"{user_repo.USER_CACHE_PREFIX}{user_id}"
+    # The TTL is fixed from when the entry was written, never extended on
+    # read, so role or verification changes made in the database directly
+    # reach active users within USER_CACHE_TTL
+    cached_user = await redis_client.get(user_key)
+    if cached_user:
+        # Recreate a detached User object from the cached dict
+        return User(**orjson.loads(cached_user))
+    user = await run_in_threadpool(user_repo.get_user_by_id, db, user_id)
     if user is None:
         raise credentials_exception
-    # Cache the user (serialize to dict)
-    user_dict = {c.name: getattr(user, c.name) for c in user.__table__.columns}
-    await redis_client.set(cache_key, json.dumps(user_dict, default=default_serializer), ex=900)  # 15 min TTL
+    user_dict = {c: getattr(user, c) for c in USER_COLUMNS}
+    await redis_client.set(user_key, orjson.dumps(user_dict), ex=USER_CACHE_TTL)
     return user
 
 async def get_current_admin(current_user=Depends(get_current_user)):
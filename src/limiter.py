@@ -1,7 +1,20 @@
+import os
 from slowapi import Limiter
 from slowapi.util import get_remote_address
+from src.services.redis_service import REDIS_URL
 
 REGISTER_LIMIT = "5/minute"
 ME_LIMIT = "5/minute"
 
-limiter = Limiter(key_func=get_remote_address)
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", REDIS_URL)
+
+# Counters live in Redis so every worker/replica enforces the same limit.
+# The moving window is checked and updated by one atomic Lua script per hit,
+# avoiding the double burst a fixed window allows at its boundary.
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    strategy="moving-window",
+    key_prefix="rl",
+    in_memory_fallback_enabled=True,
+)
@@ -1,6 +1,8 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from .routes import contacts, users
-from src.database.db import engine, Base
+from src.database.db import engine, Base, warm_pool
 from src.database.models import Base
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import _rate_limit_exceeded_handler
@@ -9,7 +11,12 @@ from src.limiter import limiter
 
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Contacts API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(warm_pool)
+    yield
+
+app = FastAPI(title="Contacts API", lifespan=lifespan)
 
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
@@ -1,9 +1,31 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, extract
+from sqlalchemy import select, update, bindparam, or_, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from datetime import date, timedelta
+import calendar
 from ..database.models import Contact
 from ..schemas import ContactCreate, ContactUpdate
 
+# Built once per dialect and reused for every bulk import; rows whose email
+# is already taken are skipped rather than failing the whole batch
+_BULK_INSERT = {
+    name: insert(Contact).on_conflict_do_nothing(index_elements=["email"]).returning(Contact)
+    for name, insert in (("postgresql", pg_insert), ("sqlite", sqlite_insert))
+}
+
+# Built once with named bind parameters; every search reuses the same
+# statement object and its compiled form
+_pattern = bindparam("pattern")
+_SEARCH_STMT = select(Contact).where(
+    Contact.user_id == bindparam("user_id"),
+    or_(
+        Contact.first_name.ilike(_pattern),
+        Contact.last_name.ilike(_pattern),
+        Contact.email.ilike(_pattern)
+    )
+)
+
 def create_contact(db: Session, contact: ContactCreate):
     """
     Create a new contact in the database.
@@ -21,19 +43,44 @@ def create_contact(db: Session, contact: ContactCreate):
     db.refresh(db_contact)
     return db_contact
 
-def get_contacts(db: Session, skip: int = 0, limit: int = 100):
+def create_contacts(db: Session, user_id: int, contacts: list[ContactCreate]):
+    """
+    Create several contacts for a user in a single INSERT.
+
+    Contacts whose email already exists are skipped.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        user_id (int): The ID of the user who owns the contacts.
+        contacts (list[ContactCreate]): Data for the new contacts.
+
+    Returns:
+        List[Contact]: The contacts that were inserted.
+    """
+    if not contacts:
+        return []
+    rows = [{**contact.model_dump(exclude={"user_id"}), "user_id": user_id} for contact in contacts]
+    stmt = _BULK_INSERT[db.get_bind().dialect.name]
+    db_contacts = db.scalars(stmt, rows).all()
+    db.commit()
+    return db_contacts
+
+def get_contacts(db: Session, user_id: int, skip: int = 0, limit: int = 100):
     """
-    Retrieve a list of contacts from the database.
+    Retrieve a list of contacts belonging to a user.
 
     Args:
         db (Session): SQLAlchemy database session.
+        user_id (int): The ID of the user who owns the contacts.
         skip (int): Number of records to skip.
         limit (int): Maximum number of records to return.
 
     Returns:
         List[Contact]: List of contact instances.
     """
-    return db.query(Contact).offset(skip).limit(limit).all()
+    return db.execute(
+        select(Contact).where(Contact.user_id == user_id).offset(skip).limit(limit)
+    ).scalars().all()
 
 def get_contact(db: Session, contact_id: int):
     """
@@ -46,28 +93,48 @@ def get_contact(db: Session, contact_id: int):
     Returns:
         Contact or None: The contact instance if found, else None.
     """
-    return db.query(Contact).filter(Contact.id == contact_id).first()
+    return db.execute(select(Contact).where(Contact.id == contact_id)).scalar_one_or_none()
 
-def update_contact(db: Session, contact_id: int, contact: ContactUpdate):
+def get_contacts_by_ids(db: Session, contact_ids: list[int]):
+    """
+    Retrieve several contacts by their IDs in a single query.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        contact_ids (list[int]): The IDs of the contacts.
+
+    Returns:
+        List[Contact]: The contacts that were found, in no particular order.
+    """
+    # Expanding bind parameter: one cached statement for any number of IDs
+    stmt = select(Contact).where(Contact.id.in_(bindparam("ids", expanding=True)))
+    return db.execute(stmt, {"ids": list(contact_ids)}).scalars().all()
+
+def update_contact(db: Session, user_id: int, contact_id: int, contact: ContactUpdate):
     """
     Update an existing contact by its ID.
 
+    The update is a single UPDATE ... RETURNING statement scoped to the
+    owner, so no separate SELECT is needed to find or check the contact.
+
     Args:
         db (Session): SQLAlchemy database session.
+        user_id (int): The ID of the user who owns the contact.
         contact_id (int): The ID of the contact to update.
         contact (ContactUpdate): Data to update the contact with.
 
     Returns:
         Contact or None: The updated contact instance if found, else None.
     """
-    db_contact = db.query(Contact).filter(Contact.id == contact_id).first()
-    if db_contact:
-        for key, value in contact.dict(exclude_unset=True).items():
-            if key == "user_id":
-                continue
-            setattr(db_contact, key, value)
-        db.commit()
-        db.refresh(db_contact)
+    values = contact.model_dump(exclude_unset=True, exclude={"user_id"})
+    stmt = (
+        update(Contact)
+        .where(Contact.id == contact_id, Contact.user_id == user_id)
+        .values(**values)
+        .returning(Contact)
+    )
+    db_contact = db.execute(stmt).scalar_one_or_none()
+    db.commit()
     return db_contact
 
 def delete_contact(db: Session, contact_id: int):
@@ -81,72 +148,51 @@ def delete_contact(db: Session, contact_id: int):
     Returns:
         Contact or None: The deleted contact instance if found, else None.
     """
-    db_contact = db.query(Contact).filter(Contact.id == contact_id).first()
+    db_contact = get_contact(db, contact_id)
     if db_contact:
         db.delete(db_contact)
         db.commit()
     return db_contact
 
-def search_contacts(db: Session, search_query: str):
+def search_contacts(db: Session, user_id: int, search_query: str):
     """
-    Search for contacts by first name, last name, or email.
+    Search for a user's contacts by first name, last name, or email.
 
     Args:
         db (Session): SQLAlchemy database session.
+        user_id (int): The ID of the user who owns the contacts.
         search_query (str): The search string.
 
     Returns:
         List[Contact]: List of matching contacts.
     """
-    return db.query(Contact).filter(
-        or_(
-            Contact.first_name.ilike(f"%{search_query}%"),
-            Contact.last_name.ilike(f"%{search_query}%"),
-            Contact.email.ilike(f"%{search_query}%")
-        )
-    ).all()
+    params = {"user_id": user_id, "pattern": f"%{search_query}%"}
+    return db.execute(_SEARCH_STMT, params).scalars().all()
 
-def get_upcoming_birthdays(db: Session):
+def get_upcoming_birthdays(db: Session, user_id: int, reference_date: date | None = None):
     """
-    Retrieve contacts with birthdays in the next 7 days.
+    Retrieve a user's contacts with birthdays in the next 7 days.
 
     Args:
         db (Session): SQLAlchemy database session.
+        user_id (int): The ID of the user who owns the contacts.
+        reference_date (date | None): Day the 7-day window starts from. Defaults to today.
 
     Returns:
         List[Contact]: List of contacts with upcoming birthdays.
     """
-    today = date.today()
-    seven_days_later = today + timedelta(days=7)
-    
-    # Extracting the day and month for comparison
-    today_month = today.month
-    today_day = today.day
-    end_month = seven_days_later.month
-    end_day = seven_days_later.day
-    
-    # If the period does not cross into the next month
-    if today_month == end_month:
-        contacts = db.query(Contact).filter(
-            and_(
-                extract('month', Contact.birthday) == today_month,
-                extract('day', Contact.birthday) >= today_day,
-                extract('day', Contact.birthday) <= end_day
-            )
-        ).all()
-    else:
-        # If the period crosses into the next month
-        contacts = db.query(Contact).filter(
-            or_(
-                and_(
-                    extract('month', Contact.birthday) == today_month,
-                    extract('day', Contact.birthday) >= today_day
-                ),
-                and_(
-                    extract('month', Contact.birthday) == end_month,
-                    extract('day', Contact.birthday) <= end_day
-                )
-            )
-        ).all()
-    
-    return contacts
+    today = reference_date or date.today()
+    # Today plus the following 7 days as (month, day) pairs
+    window = [today + timedelta(days=i) for i in range(8)]
+    days = [(d.month, d.day) for d in window]
+    # Feb 29 birthdays are celebrated on Feb 28 in non-leap years
+    if any(d.month == 2 and d.day == 28 and not calendar.isleap(d.year) for d in window):
+        days.append((2, 29))
+
+    # The list is sent as one expanding bind parameter, so the SQL shape
+    # stays the same on every day of the year
+    stmt = select(Contact).where(
+        Contact.user_id == user_id,
+        tuple_(Contact.birthday_month, Contact.birthday_day).in_(days)
+    )
+    return db.execute(stmt).scalars().all()
@@ -1,29 +1,89 @@
+from sqlalchemy import select, update, bindparam
 from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
 from src.database.models import User
 from src.schemas import UserCreate
-from passlib.context import CryptContext
 from sqlalchemy.exc import IntegrityError
-from uuid import uuid4
+from kombu.exceptions import OperationalError as BrokerError
+import hashlib
+import hmac
 import os
 from src.services.redis_service import redis_client
+from src.services.celery_app import celery_app
+from src.auth_jwt import SECRET_KEY
+from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+from functools import lru_cache
 import secrets
 import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Lowered in tests (see tests/conftest.py); production keeps the default
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 10))
+
+
+@lru_cache(maxsize=None)
+def _get_pwd_context():
+    """
+    Build the password hashing context on first use.
+
+    passlib and its bcrypt backend are imported only when a password is
+    first hashed or verified, so importing this module stays cheap for
+    code that never touches passwords.
+    """
+    from passlib.context import CryptContext
+    # Hashes made with other settings still verify (the cost is stored in the
+    # hash); authenticate_user re-hashes them when the policy marks them stale
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+@lru_cache(maxsize=None)
+def _get_dummy_hash() -> str:
+    # Verified against when the email is unknown, so both outcomes cost one bcrypt check
+    return _get_pwd_context().hash("unused")
+
+
+def _verify_dummy(password: str) -> bool:
+    return _get_pwd_context().verify(password, _get_dummy_hash())
+
+
+BCRYPT_CONCURRENCY = os.cpu_count() or 1
+
+# At most one bcrypt computation per core at a time. The thread semaphore is
+# the actual limit and also covers create_user, which runs in the threadpool;
+# async callers first queue on the event loop so a flood of logins does not
+# occupy every worker thread while waiting.
+_bcrypt_threads = threading.BoundedSemaphore(BCRYPT_CONCURRENCY)
+_bcrypt_slots = asyncio.Semaphore(BCRYPT_CONCURRENCY)
+
+
+def _bcrypt(func, *args):
+    with _bcrypt_threads:
+        return func(*args)
+
+
+async def _run_bcrypt(func, *args):
+    async with _bcrypt_slots:
+        return await asyncio.to_thread(_bcrypt, func, *args)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 RESET_TOKEN_PREFIX = "reset_token:"
 RESET_TOKEN_TTL = 1800  # 30 minutes
 
+USER_CACHE_PREFIX = "user:"
+ME_CACHE_PREFIX = "me:"
 
-async def send_verification_email(email: str, token: str):
+
+@lru_cache(maxsize=None)
+def _get_mailer() -> FastMail:
     """
-    Send a verification email with a tokenized link to the user.
+    Build the mail client once and reuse it for every message.
 
-    Args:
-        email (str): The recipient's email address.
-        token (str): The verification token to include in the link.
+    The configuration is read on first use rather than at import time, so
+    the module can be imported without mail settings (e.g. in tests).
     """
-    from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
     conf = ConnectionConfig(
         MAIL_USERNAME=os.environ.get("MAIL_USERNAME"),
         MAIL_PASSWORD=os.environ.get("MAIL_PASSWORD"),
@@ -35,6 +95,17 @@ async def send_verification_email(email: str, token: str):
         USE_CREDENTIALS=True,
         VALIDATE_CERTS=True
     )
+    return FastMail(conf)
+
+
+async def send_verification_email(email: str, token: str):
+    """
+    Send a verification email with a tokenized link to the user.
+
+    Args:
+        email (str): The recipient's email address.
+        token (str): The verification token to include in the link.
+    """
     verification_link = f"http://localhost:8000/auth/verify-email?token={token}"
     message = MessageSchema(
         subject="Verify your email",
@@ -42,8 +113,24 @@ async def send_verification_email(email: str, token: str):
         body=f"Please verify your email by clicking the following link: {verification_link}",
         subtype="plain"
     )
-    fm = FastMail(conf)
-    await fm.send_message(message)
+    await _get_mailer().send_message(message)
+
+
+def hash_token(token: str) -> bytes:
+    """
+    Derive the stored lookup key for a verification or password reset token.
+
+    The digest is keyed with SECRET_KEY, so tokens read from the database or
+    Redis cannot be redeemed, and stored digests cannot be checked against
+    guessed tokens without the key.
+
+    Args:
+        token (str): The raw token sent to the user.
+
+    Returns:
+        bytes: 32-byte HMAC-SHA256 digest of the token.
+    """
+    return hmac.new(SECRET_KEY.encode(), token.encode(), hashlib.sha256).digest()
 
 
 def get_user_by_email(db: Session, email: str):
@@ -57,7 +144,21 @@ def get_user_by_email(db: Session, email: str):
     Returns:
         User or None: The user instance if found, else None.
     """
-    return db.query(User).filter(User.email == email).first()
+    return db.execute(select(User).where(User.email == email)).scalar_one_or_none()
+
+
+def user_email_exists(db: Session, email: str) -> bool:
+    """
+    Check whether a user with the given email exists, without loading the row.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        email (str): The user's email address.
+
+    Returns:
+        bool: True if the email is registered, else False.
+    """
+    return db.execute(select(1).where(User.email == email).limit(1)).scalar() is not None
 
 
 def get_user_by_id(db: Session, user_id: int):
@@ -71,53 +172,93 @@ def get_user_by_id(db: Session, user_id: int):
     Returns:
         User or None: The user instance if found, else None.
     """
-    return db.query(User).filter(User.id == user_id).first()
+    return db.execute(select(User).where(User.id == user_id)).scalar_one_or_none()
+
+
+def get_users_by_ids(db: Session, user_ids: list[int]):
+    """
+    Retrieve several users by their IDs in a single query.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+        user_ids (list[int]): The users' IDs.
+
+    Returns:
+        List[User]: The users that were found, in no particular order.
+    """
+    # Expanding bind parameter: one cached statement for any number of IDs
+    stmt = select(User).where(User.id.in_(bindparam("ids", expanding=True)))
+    return db.execute(stmt, {"ids": list(user_ids)}).scalars().all()
 
 
-def create_user(db: Session, user: UserCreate, background_tasks=None):
+def create_user(db: Session, user: UserCreate, send_email: bool = False):
     """
     Create a new user with email verification and hashed password.
 
     Args:
         db (Session): SQLAlchemy database session.
         user (UserCreate): Data for the new user.
-        background_tasks (BackgroundTasks, optional): FastAPI background tasks for sending email.
+        send_email (bool, optional): Queue the verification email on the worker.
+
+    Email uniqueness is left to the database constraint, so a duplicate
+    costs one failed INSERT rather than a separate lookup beforehand. If the
+    broker is unreachable the failure is logged and the user is still returned.
 
     Returns:
-        User or None: The created user instance if successful, else None.
+        User or None: The created user instance, or None if the email is taken.
     """
-    hashed_password = pwd_context.hash(user.password)
-    verification_token = str(uuid4())
-    db_user = User(email=user.email, hashed_password=hashed_password, verification_token=verification_token)
+    hashed_password = _bcrypt(_get_pwd_context().hash, user.password)
+    # Only the hash is stored; the raw token travels in the email link
+    verification_token = secrets.token_urlsafe(24)
+    db_user = User(email=user.email, hashed_password=hashed_password, verification_token=hash_token(verification_token))
     db.add(db_user)
     try:
+        # Every column default is client-side and the session keeps attributes
+        # after commit, so the instance is complete without a refresh SELECT
         db.commit()
-        db.refresh(db_user)
-        if background_tasks is not None:
-            background_tasks.add_task(send_verification_email, db_user.email, verification_token)
-        return db_user
     except IntegrityError:
         db.rollback()
         return None
-
-
-def authenticate_user(db: Session, email: str, password: str):
+    if send_email:
+        try:
+            # Only the address and raw token travel through the broker
+            celery_app.send_task("send_verification_email", args=[db_user.email, verification_token])
+        except BrokerError:
+            # The user is already committed; failing the request would turn a
+            # retry into a 409 and leave the account with no email at all
+            logger.exception("Could not queue the verification email for user %s", db_user.id)
+    return db_user
+
+
+async def authenticate_user(db: Session, email: str, password: str):
     """
     Authenticate a user by email and password.
 
+    The database lookup runs in the threadpool and the bcrypt check in a
+    worker thread, limited to one concurrent check per CPU core, so neither
+    blocks the event loop. Unverified users are rejected before their own
+    hash is checked.
+
     Args:
         db (Session): SQLAlchemy database session.
         email (str): The user's email address.
         password (str): The user's password (plain text).
 
     Returns:
-        User or None: The authenticated user if credentials are valid, else None.
+        User or None: The authenticated user if credentials are valid and the
+        email is verified, else None.
     """
-    user = get_user_by_email(db, email)
-    if not user:
+    user = await run_in_threadpool(get_user_by_email, db, email)
+    if user is None or not user.is_verified:
+        # Spend the same time as a real check so the response does not reveal the email exists
+        await _run_bcrypt(_verify_dummy, password)
         return None
-    if not pwd_context.verify(password, user.hashed_password):
+    valid, new_hash = await _run_bcrypt(_get_pwd_context().verify_and_update, password, user.hashed_password)
+    if not valid:
         return None
+    if new_hash:
+        user.hashed_password = new_hash
+        await run_in_threadpool(db.commit)
     return user
 
 
@@ -133,11 +274,9 @@ def update_user_avatar(db: Session, user_id: int, avatar_url: str):
     Returns:
         User or None: The updated user instance if found, else None.
     """
-    user = db.query(User).filter(User.id == user_id).first()
-    if user:
-        user.avatar_url = avatar_url
-        db.commit()
-        db.refresh(user)
+    stmt = update(User).where(User.id == user_id).values(avatar_url=avatar_url).returning(User)
+    user = db.execute(stmt).scalar_one_or_none()
+    db.commit()
     return user
 
 
@@ -145,20 +284,24 @@ def verify_user_email(db: Session, token: str):
     """
     Verify a user's email using a verification token.
 
+    Only the ID comes back from the UPDATE, so no User row is loaded.
+
     Args:
         db (Session): SQLAlchemy database session.
-        token (str): The verification token.
+        token (str): The verification token from the email link (not its hash).
 
     Returns:
-        User or None: The verified user instance if found and token matches, else None.
+        int or None: The verified user's ID if the token matches, else None.
     """
-    user = db.query(User).filter(User.verification_token == token).first()
-    if user:
-        user.is_verified = True
-        user.verification_token = None
-        db.commit()
-        db.refresh(user)
-    return user
+    stmt = (
+        update(User)
+        .where(User.verification_token == hash_token(token))
+        .values(is_verified=True, verification_token=None)
+        .returning(User.id)
+    )
+    user_id = db.execute(stmt).scalar_one_or_none()
+    db.commit()
+    return user_id
 
 
 async def send_password_reset_email(email: str, token: str):
@@ -169,18 +312,6 @@ async def send_password_reset_email(email: str, token: str):
         email (str): The recipient's email address.
         token (str): The password reset token to include in the link.
     """
-    from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
-    conf = ConnectionConfig(
-        MAIL_USERNAME=os.environ.get("MAIL_USERNAME"),
-        MAIL_PASSWORD=os.environ.get("MAIL_PASSWORD"),
-        MAIL_FROM=os.environ.get("MAIL_FROM"),
-        MAIL_PORT=int(os.environ.get("MAIL_PORT", 465)),
-        MAIL_SERVER=os.environ.get("MAIL_SERVER"),
-        MAIL_STARTTLS=os.environ.get("MAIL_STARTTLS", "False") == "True",
-        MAIL_SSL_TLS=os.environ.get("MAIL_SSL_TLS", "True") == "True",
-        USE_CREDENTIALS=True,
-        VALIDATE_CERTS=True
-    )
     reset_link = f"http://localhost:8000/auth/reset-password?token={token}"
     message = MessageSchema(
         subject="Password Reset Request",
@@ -188,8 +319,7 @@ async def send_password_reset_email(email: str, token: str):
         body=f"To reset your password, click the following link (valid for 30 minutes): {reset_link}",
         subtype="plain"
     )
-    fm = FastMail(conf)
-    await fm.send_message(message)
+    await _get_mailer().send_message(message)
 
 
 async def create_password_reset_token(email: str) -> str:
@@ -203,7 +333,7 @@ async def create_password_reset_token(email: str) -> str:
         str: The generated token.
     """
     token = secrets.token_urlsafe(32)
-    await redis_client.set(f"{RESET_TOKEN_PREFIX}{token}", email, ex=RESET_TOKEN_TTL)
+    await redis_client.set(f"{RESET_TOKEN_PREFIX}{hash_token(token).hex()}", email, ex=RESET_TOKEN_TTL)
     return token
 
 
@@ -211,21 +341,24 @@ async def verify_password_reset_token(token: str) -> str | None:
     """
     Verify a password reset token and return the associated email if valid.
 
+    The token is consumed in the same GETDEL command, so two concurrent
+    requests cannot both redeem it.
+
     Args:
         token (str): The password reset token.
 
     Returns:
         Optional[str]: The email if the token is valid, else None.
     """
-    email = await redis_client.get(f"{RESET_TOKEN_PREFIX}{token}")
-    return email
+    email = await redis_client.getdel(f"{RESET_TOKEN_PREFIX}{hash_token(token).hex()}")
+    return email.decode() if email else None
 
 
-async def consume_password_reset_token(token: str):
-    """
-    Remove a password reset token from Redis after use.
-    """
-    await redis_client.delete(f"{RESET_TOKEN_PREFIX}{token}")
+def _set_password_hash(db: Session, email: str, hashed_password: str):
+    stmt = update(User).where(User.email == email).values(hashed_password=hashed_password).returning(User.id)
+    user_id = db.execute(stmt).scalar_one_or_none()
+    db.commit()
+    return user_id
 
 
 async def reset_user_password(db: Session, email: str, new_password: str):
@@ -237,10 +370,19 @@ async def reset_user_password(db: Session, email: str, new_password: str):
         email (str): The user's email address.
         new_password (str): The new password to set.
     """
-    user = get_user_by_email(db, email)
-    if not user:
+    hashed_password = await _run_bcrypt(_get_pwd_context().hash, new_password)
+    user_id = await run_in_threadpool(_set_password_hash, db, email, hashed_password)
+    if user_id is None:
         return False
-    user.hashed_password = pwd_context.hash(new_password)
-    db.commit()
-    db.refresh(user)
+    await invalidate_user_cache(user_id)
     return True
+
+
+async def invalidate_user_cache(user_id: int):
+    """
+    Remove the cached user record and /me body so the next request reloads them.
+
+    Args:
+        user_id (int): The user's ID.
+    """
+    await redis_client.delete(f"{USER_CACHE_PREFIX}{user_id}", f"{ME_CACHE_PREFIX}{user_id}")
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response, status
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from ..database.db import get_db
@@ -8,6 +9,30 @@ from ..schemas import Contact, ContactCreate, ContactUpdate
 
 router = APIRouter(prefix="/contacts", tags=["contacts"])
 
+# Trigram indexes cannot help with queries shorter than one trigram
+SEARCH_MIN_LENGTH = 3
+BULK_MAX_CONTACTS = 1000
+
+contact_list_adapter = TypeAdapter(List[Contact])
+
+def contact_list_response(contacts, status_code: int = status.HTTP_200_OK) -> Response:
+    """
+    Serialize a list of ORM contacts straight to a JSON response.
+
+    The rows are read into the Contact schema and encoded to JSON by the same
+    TypeAdapter, and returning a Response skips FastAPI's own response_model
+    serialization.
+
+    Args:
+        contacts (List[Contact]): Contact instances loaded from the database.
+        status_code (int): HTTP status code of the response.
+
+    Returns:
+        Response: JSON response with the serialized contacts.
+    """
+    rows = contact_list_adapter.validate_python(contacts, from_attributes=True)
+    return Response(content=contact_list_adapter.dump_json(rows), status_code=status_code, media_type="application/json")
+
 @router.post("/", response_model=Contact)
 def create_contact(contact: ContactCreate, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
     """
@@ -24,6 +49,28 @@ def create_contact(contact: ContactCreate, db: Session = Depends(get_db), curren
     contact.user_id = current_user.id
     return repository.create_contact(db=db, contact=contact)
 
+@router.post("/bulk", response_model=List[Contact], status_code=status.HTTP_201_CREATED)
+def create_contacts(
+    contacts: List[ContactCreate] = Body(..., max_length=BULK_MAX_CONTACTS),
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """
+    Create several contacts for the current user in one request.
+
+    Contacts whose email already exists are skipped.
+
+    Args:
+        contacts (List[ContactCreate]): Data for the new contacts.
+        db (Session): SQLAlchemy database session.
+        current_user (User): The currently authenticated user.
+
+    Returns:
+        List[Contact]: The contacts that were created.
+    """
+    created = repository.create_contacts(db, user_id=current_user.id, contacts=contacts)
+    return contact_list_response(created, status_code=status.HTTP_201_CREATED)
+
 @router.get("/", response_model=List[Contact])
 def read_contacts(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
     """
@@ -38,9 +85,7 @@ def read_contacts(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)
     Returns:
         List[Contact]: List of user's contacts.
     """
-    contacts = repository.get_contacts(db, skip=skip, limit=limit)
-    # Only return contacts that belong to the current user
-    return [c for c in contacts if c.user_id == current_user.id]
+    return contact_list_response(repository.get_contacts(db, user_id=current_user.id, skip=skip, limit=limit))
 
 @router.get("/birthdays/next7days", response_model=List[Contact])
 def upcoming_birthdays(db: Session = Depends(get_db), current_user=Depends(get_current_user)):
@@ -54,11 +99,10 @@ def upcoming_birthdays(db: Session = Depends(get_db), current_user=Depends(get_c
     Returns:
         List[Contact]: List of contacts with upcoming birthdays.
     """
-    contacts = repository.get_upcoming_birthdays(db)
-    return [c for c in contacts if c.user_id == current_user.id]
+    return contact_list_response(repository.get_upcoming_birthdays(db, user_id=current_user.id))
 
 @router.get("/find", response_model=List[Contact])
-def find_contacts(q: str = Query(..., min_length=1, description="Search query"), db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+def find_contacts(q: str = Query(..., min_length=SEARCH_MIN_LENGTH, description="Search query"), db: Session = Depends(get_db), current_user=Depends(get_current_user)):
     """
     Search for contacts belonging to the current user by query string.
 
@@ -70,8 +114,7 @@ def find_contacts(q: str = Query(..., min_length=1, description="Search query"),
     Returns:
         List[Contact]: List of matching contacts.
     """
-    contacts = repository.search_contacts(db, search_query=q)
-    return [c for c in contacts if c.user_id == current_user.id]
+    return contact_list_response(repository.search_contacts(db, user_id=current_user.id, search_query=q))
 
 @router.get("/{contact_id}", response_model=Contact)
 def read_contact(contact_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
@@ -105,10 +148,9 @@ def update_contact(contact_id: int, contact: ContactUpdate, db: Session = Depend
     Returns:
         Contact: The updated contact instance if found.
     """
-    db_contact = repository.get_contact(db, contact_id=contact_id)
-    if db_contact is None or db_contact.user_id != current_user.id:
+    db_contact = repository.update_contact(db, user_id=current_user.id, contact_id=contact_id, contact=contact)
+    if db_contact is None:
         raise HTTPException(status_code=404, detail="Contact not found")
-    db_contact = repository.update_contact(db, contact_id=contact_id, contact=contact)
     return db_contact
 
 @router.delete("/{contact_id}", response_model=Contact)
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Form, BackgroundTasks, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Form, BackgroundTasks, UploadFile, File, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from src.schemas import UserCreate, UserRead, UserLogin, PasswordResetRequest, PasswordReset
 from src.repository import users as user_repo
@@ -12,12 +13,16 @@ from src.limiter import limiter, REGISTER_LIMIT, ME_LIMIT
 from src.dependencies import get_current_user, get_current_admin
 from src.services.cloudinary_service import upload_avatar
 from src.services.redis_service import redis_client
+import hashlib
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+MAX_AVATAR_SIZE = 5 * 1024 * 1024  # 5 MB
+ME_CACHE_TTL = 900  # 15 min, same as the cached user record
+
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
 @limiter.limit(REGISTER_LIMIT)
-def register(request: Request, user: UserCreate, db: Session = Depends(get_db), background_tasks: BackgroundTasks = None):
+def register(request: Request, user: UserCreate, db: Session = Depends(get_db)):
     """
     Register a new user and send a verification email.
 
@@ -25,21 +30,19 @@ def register(request: Request, user: UserCreate, db: Session = Depends(get_db),
         request (Request): FastAPI request object.
         user (UserCreate): Data for the new user.
         db (Session): SQLAlchemy database session.
-        background_tasks (BackgroundTasks, optional): FastAPI background tasks for sending email.
 
     Returns:
         UserRead: The created user instance.
     """
-    db_user = user_repo.get_user_by_email(db, user.email)
-    if db_user:
-        raise HTTPException(status_code=409, detail="User with this email already exists")
-    created_user = user_repo.create_user(db, user, background_tasks)
+    # A plain def: the rate-limit check and the bcrypt hash both block, so the
+    # whole handler runs in the threadpool
+    created_user = user_repo.create_user(db, user, send_email=True)
     if not created_user:
-        raise HTTPException(status_code=409, detail="User creation failed (possibly duplicate email)")
+        raise HTTPException(status_code=409, detail="User with this email already exists")
     return created_user
 
 @router.post("/login")
-def login(
+async def login(
     username: str = Form(...),
     password: str = Form(...),
     db: Session = Depends(get_db)
@@ -55,16 +58,14 @@ def login(
     Returns:
         dict: Access token and token type if authentication is successful.
     """
-    db_user = user_repo.authenticate_user(db, username, password)
+    db_user = await user_repo.authenticate_user(db, username, password)
     if not db_user:
-        raise HTTPException(status_code=401, detail="Invalid credentials")
-    if not db_user.is_verified:
-        raise HTTPException(status_code=403, detail="Email not verified. Please check your email to verify your account.")
+        raise HTTPException(status_code=401, detail="Invalid credentials or email not verified")
     token = create_access_token({"sub": db_user.email, "user_id": db_user.id})
     return {"access_token": token, "token_type": "bearer"}
 
 @router.get("/verify-email")
-def verify_email(token: str, db: Session = Depends(get_db)):
+async def verify_email(token: str, db: Session = Depends(get_db)):
     """
     Verify a user's email address using a verification token.
 
@@ -75,32 +76,54 @@ def verify_email(token: str, db: Session = Depends(get_db)):
     Returns:
         dict: Success message if the token is valid.
     """
-    user = db.query(user_repo.User).filter(user_repo.User.verification_token == token).first()
-    if not user:
+    user_id = await run_in_threadpool(user_repo.verify_user_email, db, token)
+    if user_id is None:
         raise HTTPException(status_code=400, detail="Invalid or expired verification token")
-    user.is_verified = True
-    user.verification_token = None
-    db.commit()
+    await user_repo.invalidate_user_cache(user_id)
     return {"message": "Email successfully verified! You can now log in."}
 
-@router.get("/me")
+async def _me_body(current_user=Depends(get_current_user)) -> bytes:
+    """
+    Return the current user's /me body, serialized once and cached in Redis.
+
+    Args:
+        current_user (User): The currently authenticated user.
+
+    Returns:
+        bytes: The user serialized as UserRead JSON.
+    """
+    key = f"{user_repo.ME_CACHE_PREFIX}{current_user.id}"
+    body = await redis_client.get(key)
+    if body is None:
+        body = UserRead.model_validate(current_user).model_dump_json().encode()
+        await redis_client.set(key, body, ex=ME_CACHE_TTL)
+    return body
+
+@router.get("/me", response_model=UserRead)
 @limiter.limit(ME_LIMIT)
-def get_me(request: Request, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+def get_me(request: Request, body: bytes = Depends(_me_body)):
     """
     Retrieve the currently authenticated user's profile.
 
+    The serialized body is cached in Redis and sent with an ETag, so a client
+    repeating the request with If-None-Match gets an empty 304 instead. The
+    Redis reads happen in the async dependency; the handler itself is a plain
+    def so the blocking rate-limit check runs in the threadpool.
+
     Args:
         request (Request): FastAPI request object.
-        db (Session): SQLAlchemy database session.
-        current_user (User): The currently authenticated user.
+        body (bytes): The cached UserRead JSON of the current user.
 
     Returns:
-        User: The current user instance.
+        Response: The user serialized as UserRead, or 304 if unchanged.
     """
-    return current_user
+    etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 @router.patch("/avatar", response_model=UserRead)
-def update_avatar(
+async def update_avatar(
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
     file: UploadFile = File(...)
@@ -115,11 +138,17 @@ def update_avatar(
 
     Returns:
         UserRead: The updated user instance with the new avatar URL.
+
+    Raises:
+        HTTPException: 413 if the file is larger than MAX_AVATAR_SIZE.
     """
+    if file.size is not None and file.size > MAX_AVATAR_SIZE:
+        raise HTTPException(status_code=413, detail="Avatar file is too large")
     # Upload to Cloudinary
-    result = upload_avatar(file.file, public_id=f"user_{current_user.id}")
+    result = await run_in_threadpool(upload_avatar, file.file, public_id=f"user_{current_user.id}")
     avatar_url = result.get("secure_url")
-    user = user_repo.update_user_avatar(db, current_user.id, avatar_url)
+    user = await run_in_threadpool(user_repo.update_user_avatar, db, current_user.id, avatar_url)
+    await user_repo.invalidate_user_cache(current_user.id)
     return user
 
 @router.patch("/avatar/default", response_model=UserRead)
@@ -141,7 +170,8 @@ async def set_default_avatar(
     """
     # Example: set a predefined default avatar URL
     default_avatar_url = "https://res.cloudinary.com/demo/image/upload/v1234567890/default_avatar.png"
-    user = user_repo.update_user_avatar(db, current_admin.id, default_avatar_url)
+    user = await run_in_threadpool(user_repo.update_user_avatar, db, current_admin.id, default_avatar_url)
+    await user_repo.invalidate_user_cache(current_admin.id)
     return user
 
 @router.post("/request-password-reset", status_code=200)
@@ -157,10 +187,9 @@ async def request_password_reset(request: PasswordResetRequest, background_tasks
     Returns:
         dict: Success message (always, to prevent user enumeration).
     """
-    user = user_repo.get_user_by_email(db, request.email)
-    if user:
-        token = await user_repo.create_password_reset_token(user.email)
-        background_tasks.add_task(user_repo.send_password_reset_email, user.email, token)
+    if await run_in_threadpool(user_repo.user_email_exists, db, request.email):
+        token = await user_repo.create_password_reset_token(request.email)
+        background_tasks.add_task(user_repo.send_password_reset_email, request.email, token)
     # Always return success to avoid leaking user existence
     return {"message": "If this email is registered, a password reset link has been sent."}
 
@@ -180,7 +209,6 @@ async def reset_password(data: PasswordReset, db: Session = Depends(get_db)):
     if not email:
         raise HTTPException(status_code=400, detail="Invalid or expired password reset token")
     ok = await user_repo.reset_user_password(db, email, data.new_password)
-    await user_repo.consume_password_reset_token(data.token)
     if not ok:
         raise HTTPException(status_code=404, detail="User not found")
     return {"message": "Password has been reset successfully. You can now log in."}
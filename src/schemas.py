@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from datetime import date, datetime
 from typing import Optional
 
@@ -30,19 +30,16 @@ class UserRead(UserBase):
     Attributes:
         id (int): User ID.
         is_verified (bool): Whether the user's email is verified.
-        verification_token (Optional[str]): Email verification token.
         avatar_url (Optional[str]): URL to the user's avatar.
         created_at (Optional[datetime]): Account creation timestamp.
         role (str): Role of the user, possible values are 'user' and 'admin'.
     """
     id: int
     is_verified: bool
-    verification_token: Optional[str] = None
     avatar_url: Optional[str] = None
     created_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class UserLogin(UserBase):
     """
@@ -108,8 +105,7 @@ class Contact(ContactBase):
     id: int
     user_id: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class PasswordResetRequest(BaseModel):
     """
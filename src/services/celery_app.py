@@ -0,0 +1,11 @@
+import os
+from celery import Celery
+from src.services.redis_service import REDIS_URL
+
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", REDIS_URL)
+MAIL_QUEUE = "mail"
+
+# Only the publishing side lives here; task bodies are in src/worker.py so
+# the API process never imports the mail stack just to enqueue a job.
+celery_app = Celery("contacts", broker=CELERY_BROKER_URL)
+celery_app.conf.task_routes = {"send_verification_email": {"queue": MAIL_QUEUE}}
@@ -2,5 +2,18 @@ import os
 import redis.asyncio as redis
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 64))
+REDIS_POOL_TIMEOUT = int(os.getenv("REDIS_POOL_TIMEOUT", 5))  # seconds
 
-redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+# One pool per process, shared by every caller of redis_client.
+# When every connection is busy, callers wait up to REDIS_POOL_TIMEOUT for
+# one to be returned instead of failing with "Too many connections".
+# Responses are raw bytes; callers decode (or orjson-parse) what they read.
+_pool = redis.BlockingConnectionPool.from_url(
+    REDIS_URL,
+    max_connections=REDIS_MAX_CONNECTIONS,
+    timeout=REDIS_POOL_TIMEOUT,
+    decode_responses=False,
+)
+
+redis_client = redis.Redis(connection_pool=_pool)
@@ -0,0 +1,24 @@
+import asyncio
+from smtplib import SMTPException
+from fastapi_mail.errors import ConnectionErrors
+from src.services.celery_app import celery_app
+from src.repository import users as user_repo
+
+@celery_app.task(
+    name="send_verification_email",
+    bind=True,
+    autoretry_for=(SMTPException, ConnectionErrors),
+    retry_backoff=True,
+    max_retries=5,
+)
+def send_verification_email(self, email: str, token: str):
+    """
+    Send the verification email for a newly registered user.
+
+    SMTP failures are retried with exponential backoff.
+
+    Args:
+        email (str): The recipient's email address.
+        token (str): The raw verification token to include in the link.
+    """
+    asyncio.run(user_repo.send_verification_email(email, token))
@@ -1 +1,87 @@
+import os
+import sys
+import asyncio
+import functools
+import fakeredis
 import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+
+# Must be set before src.repository.users is imported; 4 is bcrypt's minimum cost
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+# pytest-asyncio builds its loops from the current policy, so every async
+# test and fixture runs on uvloop where it is available
+if sys.platform != "win32":
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
+def _fast_sqlite(dbapi_conn, _):
+    # Durability is irrelevant for throwaway test databases
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA synchronous=OFF")
+    cur.execute("PRAGMA journal_mode=MEMORY")
+    cur.execute("PRAGMA temp_store=MEMORY")
+    cur.execute("PRAGMA locking_mode=EXCLUSIVE")
+    cur.close()
+
+
+@pytest.fixture(scope="session")
+def make_sqlite_engine():
+    """
+    Return a factory for in-memory SQLite test engines.
+
+    StaticPool hands every session the same connection, so the schema and
+    data survive across sessions and threads without touching the disk.
+    """
+    def make():
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        event.listen(engine, "connect", _fast_sqlite)
+        return engine
+    return make
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """
+    Serve the app's Redis calls from a fresh in-process fake for one test.
+
+    Returns:
+        fakeredis.FakeAsyncRedis: The client the app now talks to.
+    """
+    from src import dependencies
+    from src.repository import users as users_repo
+    from src.routes import users as users_routes
+    client = fakeredis.FakeAsyncRedis()
+    for module in (dependencies, users_repo, users_routes):
+        monkeypatch.setattr(module, "redis_client", client)
+    return client
+
+
+@pytest.fixture(scope="session", autouse=True)
+def memoized_password_hashes():
+    """
+    Hash each distinct test password only once.
+
+    The tests reuse a handful of passwords, so repeated create_user calls get
+    the cached (still valid) bcrypt hash instead of computing a new one. The
+    context is still built on first use, so workers whose tests never touch
+    passwords do not pay for it.
+    """
+    from src.repository import users as users_repo
+    build_context = users_repo._get_pwd_context
+    with pytest.MonkeyPatch.context() as mp:
+        @functools.lru_cache(maxsize=None)
+        def memoized_context():
+            pwd_context = build_context()
+            mp.setattr(pwd_context, "hash", functools.lru_cache(maxsize=None)(pwd_context.hash))
+            return pwd_context
+
+        mp.setattr(users_repo, "_get_pwd_context", memoized_context)
+        yield
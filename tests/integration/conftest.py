@@ -0,0 +1,116 @@
+from pathlib import Path
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient, ASGITransport
+from asgi_lifespan import LifespanManager
+from sqlalchemy import update
+from sqlalchemy.orm import sessionmaker
+from src.main import app
+from src.database.db import Base, get_db
+from src.database.models import User
+from src.services.celery_app import celery_app
+from src.limiter import limiter
+
+HERE = Path(__file__).parent
+
+
+@pytest.fixture(scope="session", autouse=True)
+def queued_tasks():
+    """
+    Record Celery jobs instead of publishing them to the broker.
+
+    Returns:
+        list: (task name, args) pairs in the order they were queued.
+    """
+    tasks = []
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(celery_app, "send_task", lambda name, args=None, **kwargs: tasks.append((name, args)))
+        yield tasks
+
+
+@pytest.fixture(scope="session", autouse=True)
+def no_rate_limits():
+    # The tests reuse one client address and would otherwise trip the
+    # per-minute limits
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(limiter, "enabled", False)
+        yield
+
+
+@pytest.fixture(autouse=True)
+def offline_redis(fake_redis):
+    # Every integration test gets its own empty Redis
+    return fake_redis
+
+
+@pytest.fixture(scope="session")
+def session_factory(make_sqlite_engine):
+    """
+    Point the app's get_db at an in-memory database for the whole session.
+
+    Returns:
+        sessionmaker: Factory for sessions on the same database the app uses.
+    """
+    engine = make_sqlite_engine()
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+    def override_get_db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield factory
+    app.dependency_overrides.pop(get_db, None)
+    engine.dispose()
+
+
+@pytest.fixture
+def verify_user(session_factory):
+    """Return a helper that marks a registered user verified, optionally as admin."""
+    def verify(email, role=None):
+        values = {"is_verified": True}
+        if role == "admin":
+            values["role"] = "admin"
+        with session_factory() as db:
+            db.execute(update(User).where(User.email == email).values(**values))
+            db.commit()
+    return verify
+
+
+@pytest.fixture
+def login(ac, verify_user):
+    """
+    Return a helper that registers and verifies a user, then logs them in.
+
+    Returns:
+        Callable: async (email, password, role=None) -> Authorization headers.
+    """
+    async def login_as(email, password="password", role=None):
+        await ac.post("/auth/register", json={"email": email, "password": password})
+        verify_user(email, role=role)
+        resp = await ac.post("/auth/login", data={"username": email, "password": password})
+        assert resp.status_code == 200
+        return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+    return login_as
+
+
+def pytest_collection_modifyitems(items):
+    # Every integration test runs on the session loop that owns the shared client
+    session_loop = pytest.mark.asyncio(loop_scope="session")
+    for item in items:
+        if pytest_asyncio.is_async_test(item) and item.path.is_relative_to(HERE):
+            item.add_marker(session_loop, append=False)
+
+
+# App startup runs once per test session and every integration test shares
+# the client; tests must run on the session loop to use it
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def ac(session_factory):
+    async with LifespanManager(app):
+        transport = ASGITransport(app=app)
+        async with AsyncClient(base_url="http://test", transport=transport) as client:
+            yield client
@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+from sqlalchemy import update
+from src import dependencies
+from src.database.models import User
+from src.repository import users as users_repo
+
+
+def token_key(headers):
+    token = headers["Authorization"].removeprefix("Bearer ")
+    return f"jwt:{hashlib.sha256(token.encode()).hexdigest()}"
+
+
+async def cached_user_id(redis, headers):
+    user_id, _exp = (await redis.get(token_key(headers))).split(b":")
+    return int(user_id)
+
+
+def fail(*args, **kwargs):
+    raise AssertionError("expected a cache hit")
+
+
+async def test_cached_token_and_user_skip_decode_and_db(ac, login, fake_redis, monkeypatch):
+    headers = await login("cachehit@example.com")
+    assert (await ac.get("/contacts/", headers=headers)).status_code == 200
+    user_id = await cached_user_id(fake_redis, headers)
+    cached_user = await fake_redis.get(f"{users_repo.USER_CACHE_PREFIX}{user_id}")
+    assert b"hashed_password" not in cached_user
+
+    monkeypatch.setattr(dependencies, "verify_access_token", fail)
+    monkeypatch.setattr(users_repo, "get_user_by_id", fail)
+    assert (await ac.get("/contacts/", headers=headers)).status_code == 200
+
+
+async def test_local_token_cache_checked_before_redis(ac, login, fake_redis, monkeypatch):
+    headers = await login("localcache@example.com")
+    assert (await ac.get("/contacts/", headers=headers)).status_code == 200
+
+    read_keys = []
+    redis_get = fake_redis.get
+    async def recording_get(key):
+        read_keys.append(key)
+        return await redis_get(key)
+    monkeypatch.setattr(fake_redis, "get", recording_get)
+    monkeypatch.setattr(dependencies, "verify_access_token", fail)
+    assert (await ac.get("/contacts/", headers=headers)).status_code == 200
+    assert not any(key.startswith("jwt:") for key in read_keys)
+
+
+async def test_invalid_token_rejected_from_negative_cache(ac, fake_redis, monkeypatch):
+    headers = {"Authorization": "Bearer not-a-jwt"}
+    assert (await ac.get("/contacts/", headers=headers)).status_code == 401
+    assert await fake_redis.get(token_key(headers)) == dependencies.BAD_TOKEN
+
+    monkeypatch.setattr(dependencies, "verify_access_token", fail)
+    assert (await ac.get("/contacts/", headers=headers)).status_code == 401
+
+
+async def test_user_reloaded_after_invalidation(ac, login, fake_redis, monkeypatch):
+    headers = await login("cachereload@example.com")
+    assert (await ac.get("/contacts/", headers=headers)).status_code == 200
+    user_id = await cached_user_id(fake_redis, headers)
+
+    loads = []
+    get_user_by_id = users_repo.get_user_by_id
+    def counting_get_user_by_id(db, uid):
+        loads.append(uid)
+        return get_user_by_id(db, uid)
+    monkeypatch.setattr(users_repo, "get_user_by_id", counting_get_user_by_id)
+
+    assert (await ac.get("/contacts/", headers=headers)).status_code == 200
+    assert loads == []
+    await users_repo.invalidate_user_cache(user_id)
+    assert (await ac.get("/contacts/", headers=headers)).status_code == 200
+    assert loads == [user_id]
+    assert await fake_redis.exists(f"{users_repo.USER_CACHE_PREFIX}{user_id}")
+
+
+async def test_cached_user_expires_despite_activity(ac, login, fake_redis, session_factory, monkeypatch):
+    monkeypatch.setattr(dependencies, "USER_CACHE_TTL", 1)
+    headers = await login("cacheexpiry@example.com")
+    assert (await ac.get("/contacts/", headers=headers)).status_code == 200
+    with session_factory() as db:
+        db.execute(update(User).where(User.email == "cacheexpiry@example.com").values(role="admin"))
+        db.commit()
+
+    # Reads must not extend the entry, or an active user would never see the change
+    await asyncio.sleep(0.6)
+    assert (await ac.patch("/auth/avatar/default", headers=headers)).status_code == 403
+    await asyncio.sleep(0.6)
+    assert (await ac.patch("/auth/avatar/default", headers=headers)).status_code == 200
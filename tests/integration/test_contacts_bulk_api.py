@@ -0,0 +1,47 @@
+from src.routes.contacts import BULK_MAX_CONTACTS
+
+
+def contact(email, **fields):
+    return {
+        "first_name": "Bulk",
+        "last_name": "Contact",
+        "email": email,
+        "phone": "1234567890",
+        "birthday": "1990-05-17",
+        **fields,
+    }
+
+
+async def test_bulk_create_returns_created_contacts(ac, login):
+    headers = await login("bulkowner@example.com")
+    payload = [contact("bulk1@example.com"), contact("bulk2@example.com")]
+    resp = await ac.post("/contacts/bulk", headers=headers, json=payload)
+    assert resp.status_code == 201
+    created = resp.json()
+    assert sorted(c["email"] for c in created) == ["bulk1@example.com", "bulk2@example.com"]
+    assert all(c["id"] for c in created)
+
+
+async def test_bulk_create_rejects_too_many_contacts(ac, login):
+    headers = await login("bulklimit@example.com")
+    payload = [contact(f"limit{i}@example.com") for i in range(BULK_MAX_CONTACTS + 1)]
+    resp = await ac.post("/contacts/bulk", headers=headers, json=payload)
+    assert resp.status_code == 422
+
+
+async def test_bulk_create_is_scoped_to_current_user(ac, login):
+    owner_headers = await login("bulkscoped@example.com")
+    other_headers = await login("bulkother@example.com")
+    other_id = (await ac.get("/auth/me", headers=other_headers)).json()["id"]
+    owner_id = (await ac.get("/auth/me", headers=owner_headers)).json()["id"]
+
+    # A user_id in the payload is ignored in favour of the authenticated user
+    payload = [contact("scoped@example.com", user_id=other_id)]
+    resp = await ac.post("/contacts/bulk", headers=owner_headers, json=payload)
+    assert resp.status_code == 201
+    assert resp.json()[0]["user_id"] == owner_id
+
+    owner_contacts = (await ac.get("/contacts/", headers=owner_headers)).json()
+    other_contacts = (await ac.get("/contacts/", headers=other_headers)).json()
+    assert [c["email"] for c in owner_contacts] == ["scoped@example.com"]
+    assert other_contacts == []
@@ -0,0 +1,22 @@
+from unittest.mock import Mock
+from src.routes import users as users_routes
+
+
+async def test_oversized_avatar_rejected_before_upload(ac, login, monkeypatch):
+    upload = Mock()
+    monkeypatch.setattr(users_routes, "upload_avatar", upload)
+    headers = await login("bigavatar@example.com")
+    payload = b"\0" * (users_routes.MAX_AVATAR_SIZE + 1)
+    resp = await ac.patch("/auth/avatar", headers=headers, files={"file": ("avatar.png", payload, "image/png")})
+    assert resp.status_code == 413
+    upload.assert_not_called()
+
+
+async def test_avatar_within_limit_uploaded(ac, login, monkeypatch):
+    upload = Mock(return_value={"secure_url": "http://example.com/avatar.png"})
+    monkeypatch.setattr(users_routes, "upload_avatar", upload)
+    headers = await login("smallavatar@example.com")
+    resp = await ac.patch("/auth/avatar", headers=headers, files={"file": ("avatar.png", b"png", "image/png")})
+    assert resp.status_code == 200
+    assert resp.json()["avatar_url"] == "http://example.com/avatar.png"
+    upload.assert_called_once()
@@ -0,0 +1,38 @@
+from sqlalchemy import update
+from src.database.models import User
+from src.repository import users as users_repo
+
+
+async def test_me_returns_etag(ac, login):
+    headers = await login("meetag@example.com")
+    resp = await ac.get("/auth/me", headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["email"] == "meetag@example.com"
+    assert resp.headers["etag"]
+
+
+async def test_me_not_modified(ac, login):
+    headers = await login("me304@example.com")
+    etag = (await ac.get("/auth/me", headers=headers)).headers["etag"]
+    resp = await ac.get("/auth/me", headers={**headers, "If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.content == b""
+    assert resp.headers["etag"] == etag
+
+
+async def test_me_reloads_after_cache_invalidation(ac, login, session_factory):
+    headers = await login("mefresh@example.com")
+    first = await ac.get("/auth/me", headers=headers)
+    user_id = first.json()["id"]
+    with session_factory() as db:
+        db.execute(update(User).where(User.id == user_id).values(avatar_url="http://example.com/new.png"))
+        db.commit()
+    # Still served from the cache until it is invalidated
+    cached = await ac.get("/auth/me", headers=headers)
+    assert cached.json()["avatar_url"] == first.json()["avatar_url"]
+
+    await users_repo.invalidate_user_cache(user_id)
+    resp = await ac.get("/auth/me", headers={**headers, "If-None-Match": first.headers["etag"]})
+    assert resp.status_code == 200
+    assert resp.json()["avatar_url"] == "http://example.com/new.png"
+    assert resp.headers["etag"] != first.headers["etag"]
@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from src.database.db import Base
+
+
+def _manual_begin(dbapi_conn, _):
+    # Let SQLAlchemy emit BEGIN itself; pysqlite's implicit transactions
+    # otherwise break the SAVEPOINTs used by the db fixture
+    dbapi_conn.isolation_level = None
+
+
+def _begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
+@pytest.fixture(scope="session")
+def engine(make_sqlite_engine):
+    # The single shared connection also serves the threadpool used by the
+    # async repository functions
+    engine = make_sqlite_engine()
+    event.listen(engine, "connect", _manual_begin)
+    event.listen(engine, "begin", _begin)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    """
+    Session wrapped in a transaction that is rolled back after each test.
+
+    Commits made by the repository functions only release a SAVEPOINT, so
+    every test starts from the empty schema.
+    """
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = Session(
+        bind=connection,
+        autoflush=False,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    )
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
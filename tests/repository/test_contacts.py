@@ -1,36 +1,32 @@
+import datetime
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from src.database.db import Base
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
 from src.repository import contacts as contacts_repo
-from src.schemas import ContactCreate, ContactUpdate, UserCreate
+from src.schemas import ContactCreate, ContactUpdate, UserCreate, Contact as ContactSchema
 from src.database.models import Contact
 from src.repository.users import create_user
 
-# Use in-memory SQLite for testing
-test_engine = create_engine("sqlite:///:memory:")
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
-@pytest.fixture(scope="module")
-def db():
-    Base.metadata.create_all(bind=test_engine)
-    db = TestingSessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-    Base.metadata.drop_all(bind=test_engine)
+def mk_contact(schema=ContactCreate, **fields):
+    """Build a contact schema from known-good test data, skipping validation."""
+    return schema.model_construct(**fields)
+
+
+def make_contacts(db, rows):
+    """Insert plain contact dicts in one executemany, skipping the unit of work."""
+    db.bulk_insert_mappings(Contact, rows)
+    db.commit()
 
 
 def test_create_contact(db):
-    from src.schemas import UserCreate
-    user = create_user(db, UserCreate(email="testuser@example.com", password="password"), background_tasks=None)
-    contact_in = ContactCreate(
+    user = create_user(db, UserCreate(email="testuser@example.com", password="password"))
+    contact_in = mk_contact(
         first_name="Test",
         last_name="User",
         email="testuser@example.com",
         phone="1234567890",
-        birthday="2000-01-01",
+        birthday=datetime.date(2000, 1, 1),
         additional_data="Test contact",
         user_id=user.id
     )
@@ -41,48 +37,48 @@ def test_create_contact(db):
 
 
 def test_get_contacts_empty(db):
-    # Should return at least one contact if previous test ran
-    contacts = contacts_repo.get_contacts(db)
-    assert isinstance(contacts, list)
-    assert len(contacts) >= 1
+    user = create_user(db, UserCreate(email="testuser@example.com", password="password"))
+    contacts = contacts_repo.get_contacts(db, user.id)
+    assert contacts == []
 
 
 def test_update_contact(db):
-    from src.schemas import UserCreate
-    user = create_user(db, UserCreate(email="updateuser@example.com", password="password"), background_tasks=None)
-    contact_in = ContactCreate(
+    user = create_user(db, UserCreate(email="updateuser@example.com", password="password"))
+    contact_in = mk_contact(
         first_name="Update",
         last_name="Test",
         email="update@example.com",
         phone="1112223333",
-        birthday="1990-05-05",
+        birthday=datetime.date(1990, 5, 5),
         additional_data="Before update",
         user_id=user.id
     )
     contact = contacts_repo.create_contact(db, contact_in)
-    update_data = ContactUpdate(
+    update_data = mk_contact(
+        ContactUpdate,
         first_name="Updated",
         last_name="Tested",
         email="updated@example.com",
         phone="9998887777",
-        birthday="1991-06-06",
+        birthday=datetime.date(1991, 6, 6),
         additional_data="After update"
     )
-    updated = contacts_repo.update_contact(db, contact.id, update_data)
+    updated = contacts_repo.update_contact(db, user.id, contact.id, update_data)
     assert updated.first_name == "Updated"
     assert updated.email == "updated@example.com"
     assert updated.additional_data == "After update"
+    # Another user cannot update the contact
+    assert contacts_repo.update_contact(db, user.id + 1000, contact.id, update_data) is None
 
 
 def test_delete_contact(db):
-    from src.schemas import UserCreate
-    user = create_user(db, UserCreate(email="deleteuser@example.com", password="password"), background_tasks=None)
-    contact_in = ContactCreate(
+    user = create_user(db, UserCreate(email="deleteuser@example.com", password="password"))
+    contact_in = mk_contact(
         first_name="Delete",
         last_name="Me",
         email="delete@example.com",
         phone="5556667777",
-        birthday="1985-12-12",
+        birthday=datetime.date(1985, 12, 12),
         additional_data="To be deleted",
         user_id=user.id
     )
@@ -90,58 +86,136 @@ def test_delete_contact(db):
     deleted = contacts_repo.delete_contact(db, contact.id)
     assert deleted is not None
     # Should not be found after delete
-    from src.repository.contacts import get_contact
-    assert get_contact(db, contact.id) is None
+    assert contacts_repo.get_contact(db, contact.id) is None
 
 
 def test_search_contacts(db):
-    from src.schemas import UserCreate
-    user = create_user(db, UserCreate(email="searchuser@example.com", password="password"), background_tasks=None)
+    user = create_user(db, UserCreate(email="searchuser@example.com", password="password"))
     # Ensure at least one contact exists
-    contact_in = ContactCreate(
+    contact_in = mk_contact(
         first_name="Search",
         last_name="Target",
         email="searchtarget@example.com",
         phone="0009998888",
-        birthday="2002-02-02",
+        birthday=datetime.date(2002, 2, 2),
         additional_data="Searchable",
         user_id=user.id
     )
     contacts_repo.create_contact(db, contact_in)
-    results = contacts_repo.search_contacts(db, "Search")
+    results = contacts_repo.search_contacts(db, user.id, "Search")
     assert any(c.email == "searchtarget@example.com" for c in results)
 
 
 def test_get_upcoming_birthdays(db):
-    import datetime
-    from src.schemas import UserCreate
-    user = create_user(db, UserCreate(email="birthdaysuser@example.com", password="password"), background_tasks=None)
-    today = datetime.date.today()
-    in_3_days = today + datetime.timedelta(days=3)
-    in_10_days = today + datetime.timedelta(days=10)
-    # Contact with birthday in 3 days (should be in the list)
-    contact_soon = ContactCreate(
-        first_name="Soon",
-        last_name="Birthday",
-        email="soon@example.com",
-        phone="1231231234",
-        birthday=in_3_days.strftime("%Y-%m-%d"),
-        additional_data="Soon birthday",
-        user_id=user.id
-    )
-    # Contact with birthday in 10 days (should not be in the list)
-    contact_late = ContactCreate(
-        first_name="Late",
-        last_name="Birthday",
-        email="late@example.com",
-        phone="3213214321",
-        birthday=in_10_days.strftime("%Y-%m-%d"),
-        additional_data="Late birthday",
-        user_id=user.id
-    )
-    contacts_repo.create_contact(db, contact_soon)
-    contacts_repo.create_contact(db, contact_late)
-    results = contacts_repo.get_upcoming_birthdays(db)
+    user = create_user(db, UserCreate(email="birthdaysuser@example.com", password="password"))
+    today = datetime.date(2024, 6, 1)
+    make_contacts(db, [
+        # Birthday in 3 days (should be in the list)
+        dict(first_name="Soon", last_name="Birthday", email="soon@example.com", phone="1231231234",
+             birthday=datetime.date(1990, 6, 4), additional_data="Soon birthday", user_id=user.id),
+        # Birthday in 10 days (should not be in the list)
+        dict(first_name="Late", last_name="Birthday", email="late@example.com", phone="3213214321",
+             birthday=datetime.date(1990, 6, 11), additional_data="Late birthday", user_id=user.id),
+    ])
+    results = contacts_repo.get_upcoming_birthdays(db, user.id, reference_date=today)
     emails = [c.email for c in results]
     assert "soon@example.com" in emails
     assert "late@example.com" not in emails
+
+
+def test_get_upcoming_birthdays_wraps_year_end(db):
+    user = create_user(db, UserCreate(email="newyearuser@example.com", password="password"))
+    make_contacts(db, [
+        dict(first_name="New", last_name="Year", email="newyear@example.com", phone="1112223333",
+             birthday=datetime.date(1991, 1, 2), additional_data="", user_id=user.id),
+    ])
+    results = contacts_repo.get_upcoming_birthdays(db, user.id, reference_date=datetime.date(2024, 12, 29))
+    assert [c.email for c in results] == ["newyear@example.com"]
+
+
+def test_get_upcoming_birthdays_leap_day_in_non_leap_year(db):
+    user = create_user(db, UserCreate(email="leapuser@example.com", password="password"))
+    make_contacts(db, [
+        dict(first_name="Leap", last_name="Day", email="leap@example.com", phone="1112224444",
+             birthday=datetime.date(2000, 2, 29), additional_data="", user_id=user.id),
+    ])
+    for reference_date in (datetime.date(2025, 2, 25), datetime.date(2025, 2, 28)):
+        results = contacts_repo.get_upcoming_birthdays(db, user.id, reference_date=reference_date)
+        assert [c.email for c in results] == ["leap@example.com"]
+    # Outside the window once Feb 28 has passed
+    assert contacts_repo.get_upcoming_birthdays(db, user.id, reference_date=datetime.date(2025, 3, 1)) == []
+
+
+def test_get_contacts_only_returns_own_contacts(db):
+    owner = create_user(db, UserCreate(email="owner@example.com", password="password"))
+    other = create_user(db, UserCreate(email="other@example.com", password="password"))
+    contacts_repo.create_contact(db, mk_contact(
+        first_name="Owned",
+        last_name="Contact",
+        email="owned@example.com",
+        phone="4445556666",
+        birthday=datetime.date(1995, 3, 3),
+        user_id=other.id
+    ))
+    contacts = contacts_repo.get_contacts(db, owner.id)
+    assert all(c.user_id == owner.id for c in contacts)
+    assert "owned@example.com" not in [c.email for c in contacts]
+    results = contacts_repo.search_contacts(db, owner.id, "Owned")
+    assert results == []
+
+
+def test_get_contacts_does_not_lazy_load(db, engine):
+    user = create_user(db, UserCreate(email="testuser@example.com", password="password"))
+    contacts_repo.create_contact(db, mk_contact(
+        first_name="Lazy",
+        last_name="Load",
+        email="lazy@example.com",
+        phone="1234567890",
+        birthday=datetime.date(2000, 1, 1),
+        user_id=user.id
+    ))
+    statements = []
+
+    def count_queries(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_queries)
+    try:
+        contacts = contacts_repo.get_contacts(db, user.id)
+        [ContactSchema.model_validate(c) for c in contacts]
+    finally:
+        event.remove(engine, "before_cursor_execute", count_queries)
+    assert len(statements) <= 2
+    with pytest.raises(InvalidRequestError):
+        contacts[0].user
+
+
+def test_get_contacts_by_ids(db):
+    user = create_user(db, UserCreate(email="testuser@example.com", password="password"))
+    contacts = contacts_repo.create_contacts(db, user.id, [
+        mk_contact(first_name="First", last_name="Contact", email="first@example.com",
+                   phone="1234567890", birthday=datetime.date(2000, 1, 1)),
+        mk_contact(first_name="Second", last_name="Contact", email="second@example.com",
+                   phone="1234567890", birthday=datetime.date(2000, 1, 2)),
+    ])
+    ids = [c.id for c in contacts]
+    found = contacts_repo.get_contacts_by_ids(db, ids + [999999])
+    assert sorted(c.id for c in found) == sorted(ids)
+    assert contacts_repo.get_contacts_by_ids(db, []) == []
+
+
+def test_create_contacts_bulk(db):
+    user = create_user(db, UserCreate(email="bulkuser@example.com", password="password"))
+    batch = [
+        mk_contact(first_name="Bulk", last_name=f"Contact{i}", email=f"bulk{i}@example.com",
+                   phone="1234567890", birthday=datetime.date(1991, 2, 3))
+        for i in range(3)
+    ]
+    created = contacts_repo.create_contacts(db, user.id, batch)
+    assert sorted(c.email for c in created) == ["bulk0@example.com", "bulk1@example.com", "bulk2@example.com"]
+    assert all(c.user_id == user.id and c.id is not None for c in created)
+    # Emails already present are skipped, new ones still go in
+    again = contacts_repo.create_contacts(db, user.id, batch[:1] + [batch[0].model_copy(update={"email": "bulk3@example.com"})])
+    assert [c.email for c in again] == ["bulk3@example.com"]
+    assert len(contacts_repo.get_contacts(db, user.id)) == 4
+    assert contacts_repo.create_contacts(db, user.id, []) == []
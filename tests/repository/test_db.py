@@ -0,0 +1,22 @@
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+from src.database import db as db_module
+
+
+def test_warm_pool_opens_base_connections(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'warm.db'}", poolclass=QueuePool, pool_size=3)
+    monkeypatch.setattr(db_module, "engine", engine)
+    monkeypatch.setattr(db_module, "IS_SQLITE", False)
+    db_module.warm_pool()
+    assert engine.pool.checkedin() == 3
+    assert engine.pool.checkedout() == 0
+    engine.dispose()
+
+
+def test_warm_pool_skips_sqlite(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cold.db'}", poolclass=QueuePool, pool_size=3)
+    monkeypatch.setattr(db_module, "engine", engine)
+    monkeypatch.setattr(db_module, "IS_SQLITE", True)
+    db_module.warm_pool()
+    assert engine.pool.checkedin() == 0
+    engine.dispose()
@@ -1,24 +1,13 @@
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from src.database.db import Base
+from kombu.exceptions import OperationalError
 from src.repository import users as users_repo
 from src.schemas import UserCreate
 from src.database.models import User
 
-# Use in-memory SQLite for testing
-test_engine = create_engine("sqlite:///:memory:")
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
-@pytest.fixture(scope="module")
-def db():
-    Base.metadata.create_all(bind=test_engine)
-    db = TestingSessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-    Base.metadata.drop_all(bind=test_engine)
+@pytest.fixture
+def created_user(db):
+    return users_repo.create_user(db, UserCreate(email="testuser@example.com", password="secretpassword"))
 
 
 def test_create_user(db):
@@ -26,71 +15,125 @@ def test_create_user(db):
         email="testuser@example.com",
         password="secretpassword"
     )
-    # background_tasks is not used in repo for test simplicity
-    user = users_repo.create_user(db, user_in, background_tasks=None)
+    user = users_repo.create_user(db, user_in)
     assert user.id is not None
     assert user.email == "testuser@example.com"
     assert user.hashed_password != "secretpassword"
     assert user.is_verified is False
+    assert user.role == "user"
 
 
-def test_get_user_by_email(db):
+def test_create_user_duplicate_email(db, created_user):
+    user_in = UserCreate(email="testuser@example.com", password="another")
+    assert users_repo.create_user(db, user_in) is None
+    # The rollback only undoes the failed insert, as it would in production
+    existing = users_repo.get_user_by_email(db, "testuser@example.com")
+    assert existing is not None
+    assert existing.id == created_user.id
+
+
+def test_get_user_by_email(db, created_user):
     user = users_repo.get_user_by_email(db, "testuser@example.com")
     assert user is not None
     assert user.email == "testuser@example.com"
 
 
-def test_authenticate_user_success(db):
-    user = users_repo.authenticate_user(db, "testuser@example.com", "secretpassword")
+async def test_authenticate_user_unverified(db, created_user):
+    user = await users_repo.authenticate_user(db, "testuser@example.com", "secretpassword")
+    assert user is None
+
+
+async def test_authenticate_user_success(db, created_user):
+    created_user.is_verified = True
+    db.commit()
+    user = await users_repo.authenticate_user(db, "testuser@example.com", "secretpassword")
     assert user is not None
     assert user.email == "testuser@example.com"
 
 
-def test_authenticate_user_fail(db):
-    user = users_repo.authenticate_user(db, "testuser@example.com", "wrongpassword")
+async def test_authenticate_user_fail(db, created_user):
+    created_user.is_verified = True
+    db.commit()
+    user = await users_repo.authenticate_user(db, "testuser@example.com", "wrongpassword")
     assert user is None
 
 
-def test_get_user_by_id(db):
-    user = users_repo.get_user_by_email(db, "testuser@example.com")
-    user_by_id = users_repo.get_user_by_id(db, user.id)
+def test_get_user_by_id(db, created_user):
+    user_by_id = users_repo.get_user_by_id(db, created_user.id)
     assert user_by_id is not None
-    assert user_by_id.email == user.email
-
+    assert user_by_id.email == created_user.email
 
-def test_update_user_avatar(db):
-    user = users_repo.get_user_by_email(db, "testuser@example.com")
-    new_avatar_url = "http://example.com/avatar.png"
-    updated_user = users_repo.update_user_avatar(db, user.id, new_avatar_url)
-    assert updated_user.avatar_url == new_avatar_url
 
-
-def test_verify_user_email(db):
-    user = users_repo.get_user_by_email(db, "testuser@example.com")
-    user.verification_token = "sometoken"
+def test_verify_user_email(db, created_user):
+    created_user.verification_token = users_repo.hash_token("sometoken")
     db.commit()
-    verified_user = users_repo.verify_user_email(db, "sometoken")
-    assert verified_user is not None
+    assert users_repo.verify_user_email(db, "sometoken") == created_user.id
+    verified_user = users_repo.get_user_by_id(db, created_user.id)
     assert verified_user.is_verified is True
     assert verified_user.verification_token is None
 
 
 def test_update_user_avatar(db):
-    from src.schemas import UserCreate
-    from src.repository.users import create_user, update_user_avatar, get_user_by_id
-    user = create_user(db, UserCreate(email="avataruser@example.com", password="password"), background_tasks=None)
+    user = users_repo.create_user(db, UserCreate(email="avataruser@example.com", password="password"))
     avatar_url = "http://example.com/avatar.png"
-    updated = update_user_avatar(db, user.id, avatar_url)
+    updated = users_repo.update_user_avatar(db, user.id, avatar_url)
     assert updated.avatar_url == avatar_url
-    fetched = get_user_by_id(db, user.id)
+    fetched = users_repo.get_user_by_id(db, user.id)
     assert fetched.avatar_url == avatar_url
 
 
+def test_user_email_exists(db, created_user):
+    assert users_repo.user_email_exists(db, "testuser@example.com") is True
+    assert users_repo.user_email_exists(db, "nobody@example.com") is False
+
+
 def test_search_users_by_email(db):
-    from src.schemas import UserCreate
-    from src.repository.users import create_user, get_user_by_email
     email = "searchuser@example.com"
-    create_user(db, UserCreate(email=email, password="password"), background_tasks=None)
-    found = get_user_by_email(db, email)
+    users_repo.create_user(db, UserCreate(email=email, password="password"))
+    found = users_repo.get_user_by_email(db, email)
     assert found is not None
     assert found.email == email
+
+
+def test_verification_token_is_stored_hashed(db, monkeypatch):
+    sent = []
+    monkeypatch.setattr(users_repo.celery_app, "send_task", lambda name, args: sent.append((name, args)))
+    user = users_repo.create_user(db, UserCreate(email="hashed@example.com", password="password"), send_email=True)
+    [(task_name, (email, raw_token))] = sent
+    assert task_name == "send_verification_email"
+    assert email == "hashed@example.com"
+    assert user.verification_token == users_repo.hash_token(raw_token)
+    assert user.verification_token != raw_token
+    assert users_repo.verify_user_email(db, raw_token) == user.id
+    assert users_repo.get_user_by_id(db, user.id).is_verified is True
+    assert users_repo.verify_user_email(db, raw_token) is None
+
+
+def test_create_user_survives_broker_outage(db, monkeypatch):
+    def broker_down(name, args):
+        raise OperationalError("Error 111 connecting to localhost:6379. Connection refused.")
+    monkeypatch.setattr(users_repo.celery_app, "send_task", broker_down)
+    user = users_repo.create_user(db, UserCreate(email="nobroker@example.com", password="password"), send_email=True)
+    assert user is not None
+    assert users_repo.get_user_by_id(db, user.id).email == "nobroker@example.com"
+
+
+async def test_authenticate_user_unknown_email(db):
+    user = await users_repo.authenticate_user(db, "nobody@example.com", "secretpassword")
+    assert user is None
+
+
+def test_get_users_by_ids(db, created_user):
+    second = users_repo.create_user(db, UserCreate(email="avataruser@example.com", password="password"))
+    found = users_repo.get_users_by_ids(db, [created_user.id, second.id, 999999])
+    assert sorted(u.email for u in found) == ["avataruser@example.com", "testuser@example.com"]
+
+
+async def test_password_reset_token_is_single_use(fake_redis):
+    token = await users_repo.create_password_reset_token("reset@example.com")
+    assert await users_repo.verify_password_reset_token(token) == "reset@example.com"
+    assert await users_repo.verify_password_reset_token(token) is None
+
+
+async def test_password_reset_token_unknown(fake_redis):
+    assert await users_repo.verify_password_reset_token("not-a-token") is None